@@ -9,15 +9,56 @@ for testing the MCP server tools.
 import os
 os.chdir('/home/user/kdb_pykx_mcp_server')
 
+from datetime import date
+
 import pykx as kx
 
-# Load stocks table
+# Load stocks table. Columns keep their on-disk types (symbol and company
+# are strings) so the reference results match what the MCP server sees.
 kx.q('stocks: get`:stocks')
+stocks = kx.q('stocks')
+
+# Parameterized queries are defined once and called with their arguments,
+# so q parses each body a single time and no values are spliced into q source.
+# Python str arguments arrive in q as symbols; symbol is a string column,
+# so it is matched against their string form.
+kx.q('.gs.filterBySymbol:{[t;s;n] n sublist select from t where symbol like string s}')
+kx.q('.gs.closeAbove:{[t;x] select cnt: count i, symbols: distinct symbol from t where close > x}')
+kx.q('.gs.countSince:{[d;x] select cnt: sum cnt by symbol from 0!d where dt >= x}')
+kx.q('.gs.symbolCloseAbove:{[t;s;x] select cnt: count i, avg_close: avg close, avg_vol: avg volume from t where symbol like string s, close > x}')
+kx.q('.gs.dailyOHLC:{[d;s;n] n sublist `dt xdesc `dt xkey select dt, open, high, low, close, volume from 0!d where symbol like string s}')
+
+# Every per-day and per-symbol query below is served from one of two cached
+# aggregates, each a single pass over stocks. They are independent scans, so
+# evaluate them together with peach across q's secondary threads (PyKX
+# enables these at startup; QARGS='-s N' overrides the count).
+# - by_date: per-day, per-symbol OHLC and row count; Q10, Q21 and Q23 all
+#   work on calendar days, so timestamp is cast to date once here
+# - by_symbol: per-symbol count, close, volume and range statistics; Q7,
+#   Q11-Q17, Q24 and Q25 project its columns. The high - low range is
+#   computed once and feeds both Q25 averages
+cache = dict(zip(('by_date', 'by_symbol'), kx.q(
+    '{x[]} peach ('
+    '{select cnt: count i, open: first open, high: max high, low: min low, close: last close, volume: sum volume by dt: `date$timestamp, symbol from stocks};'
+    '{select cnt: count i, avg_close: avg close, median_close: med close, std_close: dev close, min_close: min close, max_close: max close, last_timestamp: last timestamp, last_close: last close, avg_volume: avg volume, total_volume: sum volume, avg_daily_range: avg r, avg_spread_pct: avg 100 * r % low by symbol from update r: high - low from stocks})'
+)))
 
 print("=" * 80)
 print("GOLD STANDARD QUERIES - KDB+ STOCKS TABLE")
 print("=" * 80)
 
+# Per-symbol results are printed head-first so console output stays bounded
+# however many symbols the table holds; 20 covers the bundled sample universe
+PRINT_ROWS = 20
+
+
+def show(result):
+    """Print at most PRINT_ROWS rows of a q result."""
+    print(kx.q('sublist', PRINT_ROWS, result))
+
+
+# Results are kept as Python/pandas values so they can be compared exactly;
+# the q console rendering is only produced for display
 queries = {}
 
 # =============================================================================
@@ -31,13 +72,13 @@ print("=" * 80)
 print("\n--- Query 1: List all tables ---")
 q1 = kx.q('tables[]')
 print(q1)
-queries['list_tables'] = str(q1)
+queries['list_tables'] = q1.py()
 
 # Query 2: Table schema/metadata
 print("\n--- Query 2: Table schema (meta) ---")
 q2 = kx.q('meta stocks')
 print(q2)
-queries['table_schema'] = str(q2)
+queries['table_schema'] = q2.pd()
 
 # Query 3: Row count
 print("\n--- Query 3: Row count ---")
@@ -49,13 +90,13 @@ queries['row_count'] = q3.py()
 print("\n--- Query 4: Sample rows (first 5) ---")
 q4 = kx.q('5#stocks')
 print(q4)
-queries['sample_rows'] = str(q4)
+queries['sample_rows'] = q4.pd()
 
 # Query 5: Column names
 print("\n--- Query 5: Column names ---")
 q5 = kx.q('cols stocks')
 print(q5)
-queries['column_names'] = str(q5)
+queries['column_names'] = q5.py()
 
 # =============================================================================
 # CATEGORY B: DISTINCT VALUES & DISTRIBUTIONS (Queries 6-10)
@@ -68,19 +109,19 @@ print("=" * 80)
 print("\n--- Query 6: Distinct symbols ---")
 q6 = kx.q('distinct stocks`symbol')
 print(q6)
-queries['distinct_symbols'] = str(q6)
+queries['distinct_symbols'] = q6.py()
 
 # Query 7: Count by symbol
 print("\n--- Query 7: Row count by symbol ---")
-q7 = kx.q('select cnt: count i by symbol from stocks')
-print(q7)
-queries['count_by_symbol'] = str(q7)
+q7 = kx.q('{`symbol xkey select symbol, cnt from 0!x}', cache['by_symbol'])
+show(q7)
+queries['count_by_symbol'] = q7.pd()
 
 # Query 8: Date range
 print("\n--- Query 8: Date range ---")
 q8 = kx.q('select min_date: min timestamp, max_date: max timestamp from stocks')
 print(q8)
-queries['date_range'] = str(q8)
+queries['date_range'] = q8.pd()
 
 # Query 9: Number of distinct companies
 print("\n--- Query 9: Distinct companies ---")
@@ -90,9 +131,10 @@ queries['distinct_companies'] = q9.py()
 
 # Query 10: Data points per day (sample)
 print("\n--- Query 10: Data points per day ---")
-q10 = kx.q('select cnt: count i by dt: `date$timestamp from stocks')
-print(kx.q('10#', q10))
-queries['points_per_day'] = str(kx.q('10#', q10))
+q10 = kx.q('{select cnt: sum cnt by dt from 0!x}', cache['by_date'])
+q10_head = kx.q('10#', q10)
+print(q10_head)
+queries['points_per_day'] = q10_head.pd()
 
 # =============================================================================
 # CATEGORY C: PRICE ANALYSIS (Queries 11-15)
@@ -103,33 +145,33 @@ print("=" * 80)
 
 # Query 11: Average prices by symbol
 print("\n--- Query 11: Average close price by symbol ---")
-q11 = kx.q('select avg_close: avg close by symbol from stocks')
-print(q11)
-queries['avg_price_by_symbol'] = str(q11)
+q11 = kx.q('{`symbol xkey select symbol, avg_close from 0!x}', cache['by_symbol'])
+show(q11)
+queries['avg_price_by_symbol'] = q11.pd()
 
 # Query 12: Min/Max prices by symbol
 print("\n--- Query 12: Price range by symbol ---")
-q12 = kx.q('select min_close: min close, max_close: max close, price_range: (max close) - min close by symbol from stocks')
-print(q12)
-queries['price_range_by_symbol'] = str(q12)
+q12 = kx.q('{`symbol xkey select symbol, min_close, max_close, price_range: max_close - min_close from 0!x}', cache['by_symbol'])
+show(q12)
+queries['price_range_by_symbol'] = q12.pd()
 
 # Query 13: Latest price per symbol
 print("\n--- Query 13: Latest price per symbol ---")
-q13 = kx.q('select last_timestamp: last timestamp, last_close: last close by symbol from stocks')
-print(q13)
-queries['latest_price_by_symbol'] = str(q13)
+q13 = kx.q('{`symbol xkey select symbol, last_timestamp, last_close from 0!x}', cache['by_symbol'])
+show(q13)
+queries['latest_price_by_symbol'] = q13.pd()
 
 # Query 14: Highest closing price ever
 print("\n--- Query 14: Highest closing prices ---")
-q14 = kx.q('select max_close: max close by symbol from stocks')
-print(q14)
-queries['highest_prices'] = str(q14)
+q14 = kx.q('{`symbol xkey select symbol, max_close from 0!x}', cache['by_symbol'])
+show(q14)
+queries['highest_prices'] = q14.pd()
 
 # Query 15: Price volatility (std dev) by symbol
 print("\n--- Query 15: Price volatility by symbol ---")
-q15 = kx.q('select volatility: dev close by symbol from stocks')
-print(q15)
-queries['price_volatility'] = str(q15)
+q15 = kx.q('{`symbol xkey select symbol, volatility: std_close from 0!x}', cache['by_symbol'])
+show(q15)
+queries['price_volatility'] = q15.pd()
 
 # =============================================================================
 # CATEGORY D: VOLUME ANALYSIS (Queries 16-18)
@@ -140,21 +182,23 @@ print("=" * 80)
 
 # Query 16: Average volume by symbol
 print("\n--- Query 16: Average volume by symbol ---")
-q16 = kx.q('select avg_volume: avg volume by symbol from stocks')
-print(q16)
-queries['avg_volume_by_symbol'] = str(q16)
+q16 = kx.q('{`symbol xkey select symbol, avg_volume from 0!x}', cache['by_symbol'])
+show(q16)
+queries['avg_volume_by_symbol'] = q16.pd()
 
 # Query 17: Total volume by symbol
 print("\n--- Query 17: Total volume by symbol ---")
-q17 = kx.q('select total_volume: sum volume by symbol from stocks')
-print(q17)
-queries['total_volume_by_symbol'] = str(q17)
+q17 = kx.q('{`symbol xkey select symbol, total_volume from 0!x}', cache['by_symbol'])
+show(q17)
+queries['total_volume_by_symbol'] = q17.pd()
 
 # Query 18: Top 5 highest volume days
 print("\n--- Query 18: Top 5 highest volume records ---")
-q18 = kx.q('5 sublist `volume xdesc select symbol, timestamp, volume from stocks')
+# Rank row indices by volume and gather only the winning rows, rather than
+# sorting a three-column copy of the whole table to keep five of them
+q18 = kx.q('(`symbol`timestamp`volume#stocks) 5 sublist idesc stocks`volume')
 print(q18)
-queries['top_volume_records'] = str(q18)
+queries['top_volume_records'] = q18.pd()
 
 # =============================================================================
 # CATEGORY E: FILTERING & CONDITIONS (Queries 19-22)
@@ -165,27 +209,27 @@ print("=" * 80)
 
 # Query 19: Filter by symbol
 print("\n--- Query 19: Data for AAPL (last 5) ---")
-q19 = kx.q('5#select from stocks where symbol like "AAPL"')
+q19 = kx.q('.gs.filterBySymbol', stocks, 'AAPL', 5)
 print(q19)
-queries['filter_by_symbol'] = str(q19)
+queries['filter_by_symbol'] = q19.pd()
 
 # Query 20: Filter by price threshold
 print("\n--- Query 20: Records where close > 500 ---")
-q20 = kx.q('select cnt: count i, symbols: distinct symbol from stocks where close > 500')
+q20 = kx.q('.gs.closeAbove', stocks, 500)
 print(q20)
-queries['filter_by_price'] = str(q20)
+queries['filter_by_price'] = q20.pd()
 
 # Query 21: Filter by date range
 print("\n--- Query 21: Data from 2025 ---")
-q21 = kx.q('select cnt: count i by symbol from stocks where timestamp >= 2025.01.01')
+q21 = kx.q('.gs.countSince', cache['by_date'], date(2025, 1, 1))
 print(q21)
-queries['filter_by_date'] = str(q21)
+queries['filter_by_date'] = q21.pd()
 
 # Query 22: Multi-condition filter
 print("\n--- Query 22: NVDA with close > 100 ---")
-q22 = kx.q('select cnt: count i, avg_close: avg close, avg_vol: avg volume from stocks where symbol like "NVDA", close > 100')
+q22 = kx.q('.gs.symbolCloseAbove', stocks, 'NVDA', 100)
 print(q22)
-queries['multi_condition_filter'] = str(q22)
+queries['multi_condition_filter'] = q22.pd()
 
 # =============================================================================
 # CATEGORY F: ADVANCED ANALYTICS (Queries 23-25)
@@ -196,21 +240,21 @@ print("=" * 80)
 
 # Query 23: Daily OHLC summary
 print("\n--- Query 23: Daily OHLC for AAPL (last 5 days) ---")
-q23 = kx.q('5 sublist `dt xdesc select open: first open, high: max high, low: min low, close: last close, volume: sum volume by dt: `date$timestamp from stocks where symbol like "AAPL"')
+q23 = kx.q('.gs.dailyOHLC', cache['by_date'], 'AAPL', 5)
 print(q23)
-queries['daily_ohlc'] = str(q23)
+queries['daily_ohlc'] = q23.pd()
 
 # Query 24: Moving average (simplified)
 print("\n--- Query 24: Price stats with running calculations ---")
-q24 = kx.q('select avg_close: avg close, median_close: med close, std_close: dev close by symbol from stocks')
-print(q24)
-queries['price_stats'] = str(q24)
+q24 = kx.q('{`symbol xkey select symbol, avg_close, median_close, std_close from 0!x}', cache['by_symbol'])
+show(q24)
+queries['price_stats'] = q24.pd()
 
 # Query 25: Correlation between volume and price change
 print("\n--- Query 25: Price change analysis by symbol ---")
-q25 = kx.q('select avg_daily_range: avg (high - low), avg_spread_pct: avg 100 * (high - low) % low by symbol from stocks')
-print(q25)
-queries['price_change_analysis'] = str(q25)
+q25 = kx.q('{`symbol xkey select symbol, avg_daily_range, avg_spread_pct from 0!x}', cache['by_symbol'])
+show(q25)
+queries['price_change_analysis'] = q25.pd()
 
 print("\n" + "=" * 80)
 print("GOLD STANDARD COMPLETE - 25 QUERIES EXECUTED")
@@ -20,23 +20,74 @@ Tools are organized into categories:
 
 import os
 import re
+import time
 import argparse
 import logging
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Optional
+from collections import OrderedDict
 from pathlib import Path
+from datetime import date, datetime
 
 import pykx as kx
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Global configuration
 DATA_DIR: Optional[str] = None
-LOADED_TABLES: list[str] = []
+# Fixed for the life of the process
+PYKX_VERSION: str = kx.__version__
+PYKX_LICENSED: bool = kx.licensed
+# Tables loaded by this server; checked before the tables[] cache
+LOADED_TABLES: set[str] = set()
+
+# Cached result of tables[] used for existence checks. Loads and execute_query
+# invalidate it explicitly; the TTL is a backstop for any other change.
+TABLES_CACHE_TTL = 5.0
+_TABLES_CACHE: frozenset[str] = frozenset()
+_TABLES_CACHE_TS: Optional[float] = None
+
+# Results of read-only tools keyed by (tool, arguments), in least recently
+# used order. Anything that may change table contents clears the whole cache
+# through _invalidate_tables_cache.
+TOOL_CACHE_TTL = 60.0
+TOOL_CACHE_SIZE = 256
+_TOOL_CACHE: OrderedDict[tuple, tuple[float, list[TextContent]]] = OrderedDict()
+
+# Keyed by-symbol aggregates shared by the price and volume tools, keyed by
+# (helper, table, column). Cleared together with the tool cache.
+_AGG_CACHE: dict[tuple, Any] = {}
+
+# (meta, cols) per table, prefetched when a table is loaded so table_schema
+# and column_names need no q call. Cleared together with the tool cache.
+TABLE_META: dict[str, tuple[Any, Any]] = {}
+
+# Long tool results are returned as several TextContent parts of at most
+# this many characters, split at line boundaries
+MAX_CONTENT_CHARS = 4096
+
+# Result types execute_query counts and truncates; keyed tables are
+# dictionaries. Anything else (atoms, functions) is rendered whole.
+_TRUNCATABLE = (kx.Vector, kx.Table, kx.Dictionary)
 
 # Dangerous operations that should be blocked for safety
 DANGEROUS_PATTERNS = [
@@ -52,747 +103,1189 @@ DANGEROUS_PATTERNS = [
     r'`:/',                # File path operations to root
 ]
 
-DANGEROUS_REGEX = [re.compile(p, re.IGNORECASE) for p in DANGEROUS_PATTERNS]
+# All patterns as one alternation; the named group that matched identifies
+# the pattern, so a single search() replaces one search per pattern. With
+# google-re2 installed the search runs in linear time without backtracking.
+DANGEROUS_RE = (re2 or re).compile(
+    '(?i)' + '|'.join(f'(?P<p{i}>{p})' for i, p in enumerate(DANGEROUS_PATTERNS))
+)
+
+# Literal substrings at least one of which every dangerous pattern requires.
+# Queries containing none of them skip the pattern match entirely. Queries
+# are case-folded before both steps, so Unicode variants such as the long s
+# in "ſystem" fold to the ASCII keywords they stand for.
+DANGEROUS_KEYWORDS = ("drop", "delete", "\\\\", "\\l", "exit", "value", "system", "hclose", "hdel", "`:/")
+
+
+def _compile_dangerous_database():
+    """Compile DANGEROUS_PATTERNS into a single Hyperscan block-mode database."""
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    db.compile(
+        expressions=[p.encode() for p in DANGEROUS_PATTERNS],
+        ids=list(range(len(DANGEROUS_PATTERNS))),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(DANGEROUS_PATTERNS),
+    )
+    return db
+
+
+# When hyperscan is installed, every pattern is matched in one pass over the
+# query by a single compiled automaton; otherwise DANGEROUS_RE is used
+DANGEROUS_DB = _compile_dangerous_database() if hyperscan is not None else None
 
 
 def is_dangerous_query(query: str) -> tuple[bool, str]:
     """Check if a query contains potentially dangerous operations."""
-    for i, pattern in enumerate(DANGEROUS_REGEX):
-        if pattern.search(query):
-            return True, f"Query contains dangerous pattern: {DANGEROUS_PATTERNS[i]}"
+    query_folded = query.casefold()
+    if not any(kw in query_folded for kw in DANGEROUS_KEYWORDS):
+        return False, ""
+    if DANGEROUS_DB is not None:
+        matched: list[int] = []
+
+        def on_match(id, *_):
+            matched.append(id)
+            return True  # stop at the first match
+
+        try:
+            DANGEROUS_DB.scan(query_folded.encode(), match_event_handler=on_match)
+        except hyperscan.ScanTerminated:
+            pass
+        if matched:
+            return True, f"Query contains dangerous pattern: {DANGEROUS_PATTERNS[matched[0]]}"
+        return False, ""
+    match = DANGEROUS_RE.search(query_folded)
+    if match:
+        return True, f"Query contains dangerous pattern: {DANGEROUS_PATTERNS[int(match.lastgroup[1:])]}"
     return False, ""
 
 
 def load_tables_from_directory(data_dir: str) -> list[str]:
-    """Load splayed tables from a directory into the q session."""
+    """Load splayed tables from a directory into the q session.
+
+    Every table is read in one .mcp.loadSplayed call, which fans the gets out
+    over q's secondary threads with peach.
+    """
     loaded = []
-    data_path = Path(data_dir)
 
-    if not data_path.exists():
-        logger.warning(f"Data directory does not exist: {data_dir}")
+    if not os.path.isdir(data_dir):
+        logger.warning("Data directory does not exist: %s", data_dir)
+        return loaded
+
+    with os.scandir(data_dir) as it:
+        dirs = [e for e in it
+                if e.is_dir(follow_symlinks=False) and os.path.exists(os.path.join(e.path, '.d'))]
+    if not dirs:
         return loaded
 
-    for item in data_path.iterdir():
-        if item.is_dir() and (item / '.d').exists():
-            table_name = item.name
+    names = kx.SymbolVector([e.name for e in dirs])
+    paths = kx.SymbolVector([f':{e.path}' for e in dirs])
+    ok, info = kx.q('.mcp.loadSplayed', names, paths)
+    _invalidate_tables_cache()
+
+    for entry, success, detail in zip(dirs, ok.py(), info.py()):
+        if success:
+            loaded.append(entry.name)
+            logger.info("Loaded table '%s' with %d rows", entry.name, detail)
             try:
-                kx.q(f'{table_name}: get`:{item}')
-                loaded.append(table_name)
-                count = kx.q(f'count {table_name}').py()
-                logger.info(f"Loaded table '{table_name}' with {count:,} rows")
+                build_indexes(entry.name)
+                table_meta(entry.name)
             except Exception as e:
-                logger.error(f"Failed to load table '{table_name}': {e}")
+                logger.warning("Could not index table '%s': %s", entry.name, e)
+        else:
+            if isinstance(detail, bytes):
+                detail = detail.decode()
+            logger.error("Failed to load table '%s': %s", entry.name, detail)
 
     return loaded
 
 
-def format_result(result: Any, max_width: int = 120) -> str:
-    """Format a PyKX result for display."""
+def build_indexes(table_name: str) -> dict[str, str]:
+    """Apply lookup attributes to a loaded table's columns (in memory only)."""
+    applied = kx.q('.mcp.index', kx.SymbolAtom(table_name)).py()
+    for column, attr in applied.items():
+        logger.info("Applied `%s# to '%s.%s'", attr, table_name, column)
+    return applied
+
+
+def table_meta(table_name: str) -> tuple[Any, Any]:
+    """Return (meta, cols) for a table, fetching both in one q call on a cache miss."""
+    info = TABLE_META.get(table_name)
+    if info is None:
+        meta, columns = kx.q('.mcp.schema', kx.SymbolAtom(table_name))
+        info = TABLE_META[table_name] = (meta, columns)
+    return info
+
+
+def format_result(result: Any, max_width: int = 120, max_rows: int = 100) -> str:
+    """Format a PyKX result for display.
+
+    Lists, dictionaries and tables are cut to max_rows and rendered to text in
+    a single q call, so no rows are converted that will not be shown. .Q.S
+    cuts lines by bytes, so a multibyte character split at the cut is replaced
+    rather than failing the decode.
+    """
     try:
-        result_str = str(result)
-        # Truncate very long lines
-        lines = result_str.split('\n')
-        formatted_lines = []
-        for line in lines[:100]:  # Limit to 100 lines
-            if len(line) > max_width:
-                formatted_lines.append(line[:max_width] + '...')
-            else:
-                formatted_lines.append(line)
-        if len(lines) > 100:
-            formatted_lines.append(f'... ({len(lines) - 100} more rows)')
-        return '\n'.join(formatted_lines)
+        total, hidden, text = kx.q('.mcp.render', max_rows, max_width, result)
+        total, hidden = total.py(), hidden.py()
+        # Truncate very long lines in a single pass
+        formatted = re.sub(rf'(?m)^(.{{{max_width}}}).+$', r'\1...', text.py().decode(errors='replace'))
+        if total > max_rows:
+            formatted += f'\n... ({total - max_rows} more rows)'
+        if hidden:
+            formatted += f'\n... ({hidden} more columns)'
+        return formatted
     except Exception:
-        return str(result)
+        # Keep the fallback within the same bounds as rendered output
+        text = str(result)
+        limit = max_rows * max_width
+        return text if len(text) <= limit else text[:limit] + '...'
+
+
+def split_content(contents: list[TextContent]) -> list[TextContent]:
+    """Split long text results into parts of at most MAX_CONTENT_CHARS at line boundaries."""
+    parts = []
+    for content in contents:
+        if len(content.text) <= MAX_CONTENT_CHARS:
+            parts.append(content)
+            continue
+        chunk: list[str] = []
+        size = 0
+        for line in content.text.splitlines(keepends=True):
+            if chunk and size + len(line) > MAX_CONTENT_CHARS:
+                parts.append(TextContent(type="text", text=''.join(chunk)))
+                chunk, size = [], 0
+            chunk.append(line)
+            size += len(line)
+        if chunk:
+            parts.append(TextContent(type="text", text=''.join(chunk)))
+    return parts
+
+
+def parse_q_date(value: str) -> date:
+    """Parse a YYYY.MM.DD (or ISO YYYY-MM-DD) date string."""
+    return datetime.strptime(value.replace('-', '.'), '%Y.%m.%d').date()
 
 
 def validate_table_name(name: str) -> bool:
-    """Validate table name format."""
-    return bool(re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', name))
+    """Validate table name format ([A-Za-z_][A-Za-z0-9_]*)."""
+    return isinstance(name, str) and name.isascii() and name.isidentifier()
 
 
 def validate_column_name(name: str) -> bool:
-    """Validate column name format."""
-    return bool(re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', name))
+    """Validate column name format ([A-Za-z_][A-Za-z0-9_]*)."""
+    return isinstance(name, str) and name.isascii() and name.isidentifier()
+
+
+def _validate_ident(*names: Any) -> Optional[list[TextContent]]:
+    """Return an error response for the first name that is not a valid column name, or None."""
+    for name in names:
+        if not validate_column_name(name):
+            return [TextContent(type="text", text=f"Error: Invalid column name: {name!r}")]
+    return None
+
+
+def _norm_sym(value: Any) -> str:
+    """Normalize a user-supplied ticker symbol (or pattern) to upper case."""
+    return value.upper() if isinstance(value, str) else ""
+
+
+def _invalidate_tables_cache() -> None:
+    """Force the next table_exists() call to re-read tables[] and drop cached tool results."""
+    global _TABLES_CACHE_TS
+    _TABLES_CACHE_TS = None
+    _TOOL_CACHE.clear()
+    _AGG_CACHE.clear()
+    TABLE_META.clear()
+
+
+def get_cached_tables() -> frozenset[str]:
+    """Return the names from tables[], re-querying q at most every TABLES_CACHE_TTL seconds."""
+    global _TABLES_CACHE, _TABLES_CACHE_TS
+    now = time.monotonic()
+    if _TABLES_CACHE_TS is None or now - _TABLES_CACHE_TS >= TABLES_CACHE_TTL:
+        _TABLES_CACHE = frozenset(kx.q('tables[]').py())
+        _TABLES_CACHE_TS = now
+    return _TABLES_CACHE
 
 
 def table_exists(table_name: str) -> bool:
     """Check if a table exists in the session."""
-    tables = kx.q('tables[]').py()
-    return table_name in tables
+    return table_name in LOADED_TABLES or table_name in get_cached_tables()
+
+
+def _validate_table(table_name: Any, *columns: Any) -> Optional[list[TextContent]]:
+    """Return an error response if a name is invalid or the table does not exist, or None."""
+    if not validate_table_name(table_name):
+        return [TextContent(type="text", text=f"Error: Invalid table name: {table_name!r}")]
+    error = _validate_ident(*columns)
+    if error:
+        return error
+    if not table_exists(table_name):
+        return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
+    return None
+
+
+# Parameterized q functions, defined once in the .mcp namespace at startup and
+# called by name with table and column names passed as symbols. Every query
+# is parsed once, and call sites never splice names into q source.
+Q_HELPERS: dict[str, str] = {
+    # Reads the tables at paths p in parallel and assigns those that load to
+    # the names n. Returns (ok flags; row count or error per table).
+    "loadSplayed": "{[n;p] r:{@[get;x;{x}]} peach p; ok:98h=type each r; "
+                   "(n where ok) set' r where ok; (ok; @[r; where ok; count])}",
+    # Splayed columns stay memory-mapped after get; eager copies them to the heap
+    "load": "{[n;p;e] n set $[e; select from get p; get p]; count value n}",
+    # Returns (count; hidden columns; text) for x cut to n items and rendered
+    # by q's console formatter .Q.S, sized so it never elides rows. Lines are
+    # cut just past width w, and a table keeps only the w div 2 columns that
+    # can fit in it; the number of columns dropped is returned.
+    "render": '{[n;w;x] l:(t within 0 99) and 10h<>t:type x; y:$[l; n sublist x; x]; h:0; '
+              'if[98h=t; h:0|(count cols y)-w div 2; y:((w div 2) sublist cols y)#y]; r:@[.Q.S[(n+10;w+10);0j]; y; ::]; '
+              '(`long$$[l; count x; 1]; h; $[10h=type r; -3!y; "\\n" sv r])}',
+    "schema": "{[t] (meta t; cols t)}",
+    # Memory use and the row count of every table (-1 where count fails)
+    "serverInfo": "{(.Q.w[]`used`mmap; t!{@[{count value x}; x; -1]} each t:tables[])}",
+    # Applies g# to a sym-typed symbol column and s# to temporal columns that
+    # are already ascending, in memory only. Returns column!attribute applied.
+    "index": '{[tn] m:0!meta tn; g:exec c from m where c=`symbol, t="s", null a; '
+             's:exec c from m where t in "dpz", null a; s:s where {v:?[x;();();y]; all (1_v)>=-1_v}[tn] each s; '
+             'ca:g,s; at:((count g)#`g),(count s)#`s; if[count ca; ![tn;();0b;ca!{(#;enlist x;y)}\'[at;ca]]]; ca!at}',
+
+    # Discovery
+    "countBy": "{[t;c] ?[t;();(1#c)!1#c;(1#`cnt)!enlist(count;`i)]}",
+    "perDay": "{[t;c;n] n sublist ?[t;();(1#`dt)!enlist($;enlist`date;c);(1#`cnt)!enlist(count;`i)]}",
+    # Returns (count of distinct values; the first n of them)
+    "distinct": "{[t;c;n] d:distinct ?[t;();();c]; (count d; (500&n) sublist d)}",
+    # Distinct count reads the column attribute first: u# needs no work and on
+    # s#/p# columns equal values are contiguous, so counting runs avoids hashing.
+    # Numeric columns add min/max/avg/sum and temporal columns min/max.
+    "colStats": "{[t;c] v:?[t;();();c]; a:attr v; y:type v; "
+                "d:`cnt`nulls`distinct_cnt!(count v; sum null v; $[a=`u; count v; a in `s`p; sum differ v; count distinct v]); "
+                "enlist $[y within 5 9h; d,`min`max`avg`sum!(min v; max v; avg v; sum v); y within 12 19h; d,`min`max!(min v; max v); d]}",
+    # On an s# column the range is its first and last items unless nulls, which
+    # sort first, are present
+    "dateRange": "{[t;c] v:?[t;();();c]; "
+                 "enlist `min_date`max_date!$[(`s=attr v) and not null first v; (first v; last v); (min v; max v)]}",
+
+    # Price and volume analysis: related by-symbol statistics computed in one
+    # pass; the tools select from these. Each aggregate reads only the columns
+    # its tools report, and the sorting median/dev pass is kept apart from the
+    # cheap avg/min/max one.
+    "priceAgg": '{[t;c] s:string c; n:`$("avg_";"min_";"max_"),\\:s; '
+                'r:?[t;();(1#`symbol)!1#`symbol;n!((avg;c);(min;c);(max;c))]; '
+                'v:value r; (key r)!v,\'([] price_range: v[n 2] - v[n 1])}',
+    "priceDist": '{[t;c] n:`$("avg_";"median_";"std_"),\\:string c; ?[t;();(1#`symbol)!1#`symbol;n!((avg;c);(med;c);(dev;c))]}',
+    "volumeAgg": "{[t] select avg_volume: avg volume, total_volume: sum volume by symbol from t}",
+    "rangeAgg": "{[t] select avg_daily_range: avg (high - low), avg_spread_pct: avg 100 * (high - low) % low by symbol from t}",
+    "project": "{[x;c;n] (key x)!n xcol c#value x}",
+
+    # Filtering
+    # Row counts by symbol from date s onward, up to date e unless e is null
+    "countByDate": "{[t;s;e] w:enlist(>=;`timestamp;s); if[not null e; w,:enlist(<=;`timestamp;e)]; "
+                   "?[t;w;(1#`symbol)!1#`symbol;(1#`cnt)!enlist(count;`i)]}",
+    # Row count and distinct symbols where column c compares to v, one helper
+    # per operator so the comparison is fixed when the helper is defined
+    **{f"threshold{o.capitalize()}": f"{{[t;c;v] ?[t;enlist({op};c;v);0b;`cnt`symbols!((count;`i);(distinct;`symbol))]}}"
+       for o, op in {"gt": ">", "lt": "<", "gte": ">=", "lte": "<="}.items()},
+    # Where clause matching symbol against s: an equality q can answer from a
+    # g#/p# index when s has no wildcards and the column is sym-typed, else like
+    "symbolWhere": '{[t;s] $[(not any s in "*?[") and 11h=type value[t]`symbol; '
+                   'enlist(=;`symbol;enlist`$s); enlist(like;`symbol;enlist s)]}',
+    "symbolSummary": "{[t;s] ?[t;.mcp.symbolWhere[t;s];0b;`cnt`avg_close`avg_volume!((count;`i);(avg;`close);(avg;`volume))]}",
+    # Daily OHLC bars of every symbol, built once per load; dailyOHLC filters
+    # these bars rather than rescanning the full history of the table. For an
+    # exact symbol each day has a single bar, identical to aggregating its
+    # rows directly. A wildcard pattern combines one bar per matching symbol
+    # per day, taking open and close from the first and last symbol in symbol
+    # order rather than from the first and last matching row.
+    "dailyRollup": "{[t] 0!?[t;();`symbol`dt!(`symbol;($;enlist`date;`timestamp));"
+                   "`open`high`low`close`volume!((first;`open);(max;`high);(min;`low);(last;`close);(sum;`volume))]}",
+    "dailyOHLC": "{[r;s;n] n sublist `dt xdesc ?[r;.mcp.symbolWhere[r;s];(1#`dt)!1#`dt;"
+                 "`open`high`low`close`volume!((first;`open);(max;`high);(min;`low);(last;`close);(sum;`volume))]}",
+
+    # Row limits are applied before rows are materialized: these helpers index
+    # only the rows they return. filterSymbol also returns the match count.
+    "topVolume": "{[t;n] d:value t; (`symbol`timestamp`volume#d) (100&n) sublist idesc d`volume}",
+    "filterSymbol": "{[t;s;n] w:?[t;.mcp.symbolWhere[t;s];();`i]; (count w; (value t) (1000&n) sublist w)}",
+    "rowCount": "{[t] count value t}",
+    "sample": "{[t;n] (100&n) sublist value t}",
+    "describe": "{[t;n] d:value t; (count d; (100&n) sublist d)}",
+}
+
+
+def _register_q_helpers() -> None:
+    """Define every Q_HELPERS entry as .mcp.<name> in the q session."""
+    for name, source in Q_HELPERS.items():
+        kx.q(f'.mcp.{name}:{source}')
+
+
+def _symbol_agg(helper: str, table_name: str, *columns: str) -> Any:
+    """Return the by-symbol aggregate .mcp.<helper> for a table, computing it once per load."""
+    key = (helper, table_name, *columns)
+    agg = _AGG_CACHE.get(key)
+    if agg is None:
+        agg = kx.q(f'.mcp.{helper}', kx.SymbolAtom(table_name), *(kx.SymbolAtom(c) for c in columns))
+        _AGG_CACHE[key] = agg
+    return agg
+
+
+def _agg_columns(agg: Any, columns: list[str], names: Optional[list[str]] = None) -> Any:
+    """Select (and optionally rename) columns of a keyed by-symbol aggregate."""
+    return kx.q('.mcp.project', agg, kx.SymbolVector(columns), kx.SymbolVector(names or columns))
 
 
 # Create the MCP server
 app = Server("kdb-pykx-mcp-server")
 
 
+# Tool descriptors, built once at import and returned by every list_tools call
+TOOLS = [
+    # =====================================================================
+    # CATEGORY A: BASIC TABLE INFORMATION (Tools 1-6)
+    # =====================================================================
+    Tool(
+        name="list_tables",
+        description="List all tables available in the KDB+ session",
+        inputSchema={"type": "object", "properties": {}, "required": []}
+    ),
+    Tool(
+        name="table_schema",
+        description="Get the schema (column names, types, attributes) of a table using meta",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"}
+            },
+            "required": ["table_name"]
+        }
+    ),
+    Tool(
+        name="table_count",
+        description="Get the number of rows in a table",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"}
+            },
+            "required": ["table_name"]
+        }
+    ),
+    Tool(
+        name="table_sample",
+        description="Get sample rows from a table (first N rows)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"},
+                "num_rows": {"type": "integer", "description": "Number of rows (default: 10, max: 100)", "default": 10}
+            },
+            "required": ["table_name"]
+        }
+    ),
+    Tool(
+        name="column_names",
+        description="Get the list of column names in a table",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"}
+            },
+            "required": ["table_name"]
+        }
+    ),
+    Tool(
+        name="describe_table",
+        description="Get the schema, row count, and sample rows of a table in one call",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"},
+                "num_rows": {"type": "integer", "description": "Number of sample rows (default: 5, max: 100)", "default": 5}
+            },
+            "required": ["table_name"]
+        }
+    ),
+
+    # =====================================================================
+    # CATEGORY B: DATA DISCOVERY (Tools 7-11)
+    # =====================================================================
+    Tool(
+        name="distinct_values",
+        description="Get distinct values in a column (useful for symbols, categories)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"},
+                "column_name": {"type": "string", "description": "Name of the column"},
+                "limit": {"type": "integer", "description": "Max values to return (default: 50)", "default": 50}
+            },
+            "required": ["table_name", "column_name"]
+        }
+    ),
+    Tool(
+        name="count_by_group",
+        description="Get row counts grouped by a column (distribution)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"},
+                "group_column": {"type": "string", "description": "Column to group by"}
+            },
+            "required": ["table_name", "group_column"]
+        }
+    ),
+    Tool(
+        name="date_range",
+        description="Get the min and max dates/timestamps in a table",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"},
+                "date_column": {"type": "string", "description": "Date/timestamp column name", "default": "timestamp"}
+            },
+            "required": ["table_name"]
+        }
+    ),
+    Tool(
+        name="data_points_per_day",
+        description="Count data points per day for time series analysis",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"},
+                "date_column": {"type": "string", "description": "Date/timestamp column", "default": "timestamp"},
+                "limit": {"type": "integer", "description": "Number of days to show (default: 10)", "default": 10}
+            },
+            "required": ["table_name"]
+        }
+    ),
+    Tool(
+        name="column_stats",
+        description="Get basic statistics for a numeric column (count, nulls, distinct count)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table"},
+                "column_name": {"type": "string", "description": "Name of the column"}
+            },
+            "required": ["table_name", "column_name"]
+        }
+    ),
+
+    # =====================================================================
+    # CATEGORY C: PRICE ANALYSIS (Tools 12-16)
+    # =====================================================================
+    Tool(
+        name="average_price_by_symbol",
+        description="Calculate average price (close) for each symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "price_column": {"type": "string", "description": "Price column name", "default": "close"}
+            },
+            "required": []
+        }
+    ),
+    Tool(
+        name="price_range_by_symbol",
+        description="Get min, max, and price range for each symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "price_column": {"type": "string", "description": "Price column name", "default": "close"}
+            },
+            "required": []
+        }
+    ),
+    Tool(
+        name="highest_prices",
+        description="Get the highest (max) price for each symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "price_column": {"type": "string", "description": "Price column name", "default": "close"}
+            },
+            "required": []
+        }
+    ),
+    Tool(
+        name="price_volatility",
+        description="Calculate price volatility (standard deviation) for each symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "price_column": {"type": "string", "description": "Price column name", "default": "close"}
+            },
+            "required": []
+        }
+    ),
+    Tool(
+        name="price_statistics",
+        description="Get comprehensive price stats: avg, median, std dev for each symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "price_column": {"type": "string", "description": "Price column name", "default": "close"}
+            },
+            "required": []
+        }
+    ),
+
+    # =====================================================================
+    # CATEGORY D: VOLUME ANALYSIS (Tools 17-19)
+    # =====================================================================
+    Tool(
+        name="average_volume_by_symbol",
+        description="Calculate average trading volume for each symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"}
+            },
+            "required": []
+        }
+    ),
+    Tool(
+        name="total_volume_by_symbol",
+        description="Calculate total trading volume for each symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"}
+            },
+            "required": []
+        }
+    ),
+    Tool(
+        name="top_volume_records",
+        description="Get records with the highest trading volume",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "limit": {"type": "integer", "description": "Number of records (default: 10, max: 100)", "default": 10}
+            },
+            "required": []
+        }
+    ),
+
+    # =====================================================================
+    # CATEGORY E: FILTERING & SELECTION (Tools 20-23)
+    # =====================================================================
+    Tool(
+        name="filter_by_symbol",
+        description="Get data for a specific stock symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "symbol": {"type": "string", "description": "Stock symbol (e.g., AAPL, NVDA)"},
+                "limit": {"type": "integer", "description": "Max rows to return (default: 100)", "default": 100}
+            },
+            "required": ["symbol"]
+        }
+    ),
+    Tool(
+        name="filter_by_price_threshold",
+        description="Get records where price exceeds a threshold",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "price_column": {"type": "string", "description": "Price column", "default": "close"},
+                "threshold": {"type": "number", "description": "Price threshold"},
+                "operator": {"type": "string", "description": "Comparison: gt, lt, gte, lte", "default": "gt"}
+            },
+            "required": ["threshold"]
+        }
+    ),
+    Tool(
+        name="filter_by_date",
+        description="Get data from a specific year or date range",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "year": {"type": "integer", "description": "Year to filter (e.g., 2025)"},
+                "start_date": {"type": "string", "description": "Start date (YYYY.MM.DD format)"},
+                "end_date": {"type": "string", "description": "End date (YYYY.MM.DD format)"}
+            },
+            "required": []
+        }
+    ),
+    Tool(
+        name="symbol_summary",
+        description="Get a summary for a specific symbol: count, avg price, avg volume",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "symbol": {"type": "string", "description": "Stock symbol (e.g., NVDA)"}
+            },
+            "required": ["symbol"]
+        }
+    ),
+
+    # =====================================================================
+    # CATEGORY F: ADVANCED ANALYTICS (Tools 24-26)
+    # =====================================================================
+    Tool(
+        name="daily_ohlc",
+        description="Get daily OHLC (Open, High, Low, Close) aggregation for a symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
+                "symbol": {"type": "string", "description": "Stock symbol"},
+                "limit": {"type": "integer", "description": "Number of days (default: 10)", "default": 10}
+            },
+            "required": ["symbol"]
+        }
+    ),
+    Tool(
+        name="price_change_analysis",
+        description="Analyze daily price ranges and spread percentages by symbol",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"}
+            },
+            "required": []
+        }
+    ),
+    Tool(
+        name="execute_query",
+        description="Execute a custom q query. Use for complex queries not covered by other tools. Dangerous operations are blocked.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "The q query to execute"},
+                "max_rows": {"type": "integer", "description": "Max rows to return (default: 100)", "default": 100}
+            },
+            "required": ["query"]
+        }
+    ),
+
+    # =====================================================================
+    # CATEGORY G: SERVER & TABLE MANAGEMENT (Tools 27-28)
+    # =====================================================================
+    Tool(
+        name="server_info",
+        description="Get information about the KDB+/PyKX session and loaded tables",
+        inputSchema={"type": "object", "properties": {}, "required": []}
+    ),
+    Tool(
+        name="load_table",
+        description="Load a splayed table from disk into the session",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "table_path": {"type": "string", "description": "Path to the splayed table directory"},
+                "table_name": {"type": "string", "description": "Name for the table (optional)"},
+                "eager": {"type": "boolean", "description": "Copy columns into memory instead of leaving them memory-mapped (default: false)"},
+                "build_indexes": {"type": "boolean", "description": "Apply g# to a symbol column and s# to sorted date columns (default: true)"}
+            },
+            "required": ["table_path"]
+        }
+    ),
+]
+
+
 @app.list_tools()
 async def list_tools():
     """List available tools for the MCP client."""
-    return [
-        # =====================================================================
-        # CATEGORY A: BASIC TABLE INFORMATION (Tools 1-5)
-        # =====================================================================
-        Tool(
-            name="list_tables",
-            description="List all tables available in the KDB+ session",
-            inputSchema={"type": "object", "properties": {}, "required": []}
-        ),
-        Tool(
-            name="table_schema",
-            description="Get the schema (column names, types, attributes) of a table using meta",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table"}
-                },
-                "required": ["table_name"]
-            }
-        ),
-        Tool(
-            name="table_count",
-            description="Get the number of rows in a table",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table"}
-                },
-                "required": ["table_name"]
-            }
-        ),
-        Tool(
-            name="table_sample",
-            description="Get sample rows from a table (first N rows)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table"},
-                    "num_rows": {"type": "integer", "description": "Number of rows (default: 10, max: 100)", "default": 10}
-                },
-                "required": ["table_name"]
-            }
-        ),
-        Tool(
-            name="column_names",
-            description="Get the list of column names in a table",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table"}
-                },
-                "required": ["table_name"]
-            }
-        ),
-
-        # =====================================================================
-        # CATEGORY B: DATA DISCOVERY (Tools 6-10)
-        # =====================================================================
-        Tool(
-            name="distinct_values",
-            description="Get distinct values in a column (useful for symbols, categories)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table"},
-                    "column_name": {"type": "string", "description": "Name of the column"},
-                    "limit": {"type": "integer", "description": "Max values to return (default: 50)", "default": 50}
-                },
-                "required": ["table_name", "column_name"]
-            }
-        ),
-        Tool(
-            name="count_by_group",
-            description="Get row counts grouped by a column (distribution)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table"},
-                    "group_column": {"type": "string", "description": "Column to group by"}
-                },
-                "required": ["table_name", "group_column"]
-            }
-        ),
-        Tool(
-            name="date_range",
-            description="Get the min and max dates/timestamps in a table",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table"},
-                    "date_column": {"type": "string", "description": "Date/timestamp column name", "default": "timestamp"}
-                },
-                "required": ["table_name"]
-            }
-        ),
-        Tool(
-            name="data_points_per_day",
-            description="Count data points per day for time series analysis",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table"},
-                    "date_column": {"type": "string", "description": "Date/timestamp column", "default": "timestamp"},
-                    "limit": {"type": "integer", "description": "Number of days to show (default: 10)", "default": 10}
-                },
-                "required": ["table_name"]
-            }
-        ),
-        Tool(
-            name="column_stats",
-            description="Get basic statistics for a numeric column (count, nulls, distinct count)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table"},
-                    "column_name": {"type": "string", "description": "Name of the column"}
-                },
-                "required": ["table_name", "column_name"]
-            }
-        ),
-
-        # =====================================================================
-        # CATEGORY C: PRICE ANALYSIS (Tools 11-15)
-        # =====================================================================
-        Tool(
-            name="average_price_by_symbol",
-            description="Calculate average price (close) for each symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "price_column": {"type": "string", "description": "Price column name", "default": "close"}
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="price_range_by_symbol",
-            description="Get min, max, and price range for each symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "price_column": {"type": "string", "description": "Price column name", "default": "close"}
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="highest_prices",
-            description="Get the highest (max) price for each symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "price_column": {"type": "string", "description": "Price column name", "default": "close"}
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="price_volatility",
-            description="Calculate price volatility (standard deviation) for each symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "price_column": {"type": "string", "description": "Price column name", "default": "close"}
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="price_statistics",
-            description="Get comprehensive price stats: avg, median, std dev for each symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "price_column": {"type": "string", "description": "Price column name", "default": "close"}
-                },
-                "required": []
-            }
-        ),
-
-        # =====================================================================
-        # CATEGORY D: VOLUME ANALYSIS (Tools 16-18)
-        # =====================================================================
-        Tool(
-            name="average_volume_by_symbol",
-            description="Calculate average trading volume for each symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"}
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="total_volume_by_symbol",
-            description="Calculate total trading volume for each symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"}
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="top_volume_records",
-            description="Get records with the highest trading volume",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "limit": {"type": "integer", "description": "Number of records (default: 10)", "default": 10}
-                },
-                "required": []
-            }
-        ),
-
-        # =====================================================================
-        # CATEGORY E: FILTERING & SELECTION (Tools 19-22)
-        # =====================================================================
-        Tool(
-            name="filter_by_symbol",
-            description="Get data for a specific stock symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "symbol": {"type": "string", "description": "Stock symbol (e.g., AAPL, NVDA)"},
-                    "limit": {"type": "integer", "description": "Max rows to return (default: 100)", "default": 100}
-                },
-                "required": ["symbol"]
-            }
-        ),
-        Tool(
-            name="filter_by_price_threshold",
-            description="Get records where price exceeds a threshold",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "price_column": {"type": "string", "description": "Price column", "default": "close"},
-                    "threshold": {"type": "number", "description": "Price threshold"},
-                    "operator": {"type": "string", "description": "Comparison: gt, lt, gte, lte", "default": "gt"}
-                },
-                "required": ["threshold"]
-            }
-        ),
-        Tool(
-            name="filter_by_date",
-            description="Get data from a specific year or date range",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "year": {"type": "integer", "description": "Year to filter (e.g., 2025)"},
-                    "start_date": {"type": "string", "description": "Start date (YYYY.MM.DD format)"},
-                    "end_date": {"type": "string", "description": "End date (YYYY.MM.DD format)"}
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="symbol_summary",
-            description="Get a summary for a specific symbol: count, avg price, avg volume",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "symbol": {"type": "string", "description": "Stock symbol (e.g., NVDA)"}
-                },
-                "required": ["symbol"]
-            }
-        ),
-
-        # =====================================================================
-        # CATEGORY F: ADVANCED ANALYTICS (Tools 23-25)
-        # =====================================================================
-        Tool(
-            name="daily_ohlc",
-            description="Get daily OHLC (Open, High, Low, Close) aggregation for a symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"},
-                    "symbol": {"type": "string", "description": "Stock symbol"},
-                    "limit": {"type": "integer", "description": "Number of days (default: 10)", "default": 10}
-                },
-                "required": ["symbol"]
-            }
-        ),
-        Tool(
-            name="price_change_analysis",
-            description="Analyze daily price ranges and spread percentages by symbol",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Name of the table", "default": "stocks"}
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="execute_query",
-            description="Execute a custom q query. Use for complex queries not covered by other tools. Dangerous operations are blocked.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string", "description": "The q query to execute"},
-                    "max_rows": {"type": "integer", "description": "Max rows to return (default: 100)", "default": 100}
-                },
-                "required": ["query"]
-            }
-        ),
-
-        # =====================================================================
-        # CATEGORY G: SERVER & TABLE MANAGEMENT (Tools 26-27)
-        # =====================================================================
-        Tool(
-            name="server_info",
-            description="Get information about the KDB+/PyKX session and loaded tables",
-            inputSchema={"type": "object", "properties": {}, "required": []}
-        ),
-        Tool(
-            name="load_table",
-            description="Load a splayed table from disk into the session",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_path": {"type": "string", "description": "Path to the splayed table directory"},
-                    "table_name": {"type": "string", "description": "Name for the table (optional)"}
-                },
-                "required": ["table_path"]
-            }
-        ),
-    ]
+    return list(TOOLS)
+
+
+# =====================================================================
+# CATEGORY A: BASIC TABLE INFORMATION
+# =====================================================================
+
+
+async def _h_list_tables(arguments: dict) -> list[TextContent]:
+    """List all tables available in the KDB+ session."""
+    tables = sorted(get_cached_tables())
+    if not tables:
+        return [TextContent(type="text", text="No tables found in the current session.")]
+    table_list = "\n".join([f"  - {t}" for t in tables])
+    return [TextContent(type="text", text=f"Available tables ({len(tables)}):\n{table_list}")]
+
+
+async def _h_table_schema(arguments: dict) -> list[TextContent]:
+    """Get the schema (column names, types, attributes) of a table using meta."""
+    table_name = arguments.get("table_name")
+    error = _validate_table(table_name)
+    if error:
+        return error
+    result = table_meta(table_name)[0]
+    return [TextContent(type="text", text=f"Schema for '{table_name}':\n{format_result(result)}")]
+
+
+async def _h_table_count(arguments: dict) -> list[TextContent]:
+    """Get the number of rows in a table."""
+    table_name = arguments.get("table_name")
+    error = _validate_table(table_name)
+    if error:
+        return error
+    count = kx.q('.mcp.rowCount', kx.SymbolAtom(table_name)).py()
+    return [TextContent(type="text", text=f"Table '{table_name}' has {count:,} rows")]
+
+
+async def _h_table_sample(arguments: dict) -> list[TextContent]:
+    """Get sample rows from a table (first N rows)."""
+    table_name = arguments.get("table_name")
+    num_rows = int(arguments.get("num_rows", 10))
+    error = _validate_table(table_name)
+    if error:
+        return error
+    result = kx.q('.mcp.sample', kx.SymbolAtom(table_name), num_rows)
+    return [TextContent(type="text", text=f"Sample ({len(result)} rows) from '{table_name}':\n{format_result(result)}")]
+
+
+async def _h_column_names(arguments: dict) -> list[TextContent]:
+    """Get the list of column names in a table."""
+    table_name = arguments.get("table_name")
+    error = _validate_table(table_name)
+    if error:
+        return error
+    result = table_meta(table_name)[1]
+    return [TextContent(type="text", text=f"Columns in '{table_name}':\n{format_result(result)}")]
+
+
+async def _h_describe_table(arguments: dict) -> list[TextContent]:
+    """Get the schema, row count, and sample rows of a table in one call."""
+    table_name = arguments.get("table_name")
+    num_rows = int(arguments.get("num_rows", 5))
+    error = _validate_table(table_name)
+    if error:
+        return error
+    meta = table_meta(table_name)[0]
+    count, sample = kx.q('.mcp.describe', kx.SymbolAtom(table_name), num_rows)
+    return [TextContent(
+        type="text",
+        text=f"Schema for '{table_name}':\n{format_result(meta)}\n\n"
+             f"Rows: {count.py():,}\n\n"
+             f"Sample ({len(sample)} rows):\n{format_result(sample)}"
+    )]
+
+
+# =====================================================================
+# CATEGORY B: DATA DISCOVERY
+# =====================================================================
+
+
+async def _h_distinct_values(arguments: dict) -> list[TextContent]:
+    """Get distinct values in a column (useful for symbols, categories)."""
+    table_name = arguments.get("table_name")
+    column_name = arguments.get("column_name")
+    limit = int(arguments.get("limit", 50))
+    error = _validate_table(table_name, column_name)
+    if error:
+        return error
+    count, result = kx.q('.mcp.distinct', kx.SymbolAtom(table_name), kx.SymbolAtom(column_name), limit)
+    count = count.py()
+    return [TextContent(type="text", text=f"Distinct values in '{table_name}.{column_name}' ({count:,} total, showing {len(result)}):\n{format_result(result)}")]
+
+
+async def _h_count_by_group(arguments: dict) -> list[TextContent]:
+    """Get row counts grouped by a column (distribution)."""
+    table_name = arguments.get("table_name")
+    group_column = arguments.get("group_column")
+    error = _validate_table(table_name, group_column)
+    if error:
+        return error
+    result = kx.q('.mcp.countBy', kx.SymbolAtom(table_name), kx.SymbolAtom(group_column))
+    return [TextContent(type="text", text=f"Count by '{group_column}':\n{format_result(result)}")]
+
+
+async def _h_date_range(arguments: dict) -> list[TextContent]:
+    """Get the min and max dates/timestamps in a table."""
+    table_name = arguments.get("table_name")
+    date_column = arguments.get("date_column", "timestamp")
+    error = _validate_table(table_name, date_column)
+    if error:
+        return error
+    result = kx.q('.mcp.dateRange', kx.SymbolAtom(table_name), kx.SymbolAtom(date_column))
+    return [TextContent(type="text", text=f"Date range in '{table_name}':\n{format_result(result)}")]
+
+
+async def _h_data_points_per_day(arguments: dict) -> list[TextContent]:
+    """Count data points per day for time series analysis."""
+    table_name = arguments.get("table_name")
+    date_column = arguments.get("date_column", "timestamp")
+    limit = int(arguments.get("limit", 10))
+    error = _validate_table(table_name, date_column)
+    if error:
+        return error
+    result = kx.q('.mcp.perDay', kx.SymbolAtom(table_name), kx.SymbolAtom(date_column), limit)
+    return [TextContent(type="text", text=f"Data points per day:\n{format_result(result)}")]
+
+
+async def _h_column_stats(arguments: dict) -> list[TextContent]:
+    """Get basic statistics for a numeric column (count, nulls, distinct count)."""
+    table_name = arguments.get("table_name")
+    column_name = arguments.get("column_name")
+    error = _validate_table(table_name, column_name)
+    if error:
+        return error
+    result = kx.q('.mcp.colStats', kx.SymbolAtom(table_name), kx.SymbolAtom(column_name))
+    return [TextContent(type="text", text=f"Stats for '{table_name}.{column_name}':\n{format_result(result)}")]
+
+
+# =====================================================================
+# CATEGORY C: PRICE ANALYSIS
+# =====================================================================
+
+
+async def _h_average_price_by_symbol(arguments: dict) -> list[TextContent]:
+    """Calculate average price (close) for each symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    price_column = arguments.get("price_column", "close")
+    error = _validate_table(table_name, price_column)
+    if error:
+        return error
+    result = _agg_columns(_symbol_agg('priceAgg', table_name, price_column), [f'avg_{price_column}'])
+    return [TextContent(type="text", text=f"Average {price_column} by symbol:\n{format_result(result)}")]
+
+
+async def _h_price_range_by_symbol(arguments: dict) -> list[TextContent]:
+    """Get min, max, and price range for each symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    price_column = arguments.get("price_column", "close")
+    error = _validate_table(table_name, price_column)
+    if error:
+        return error
+    result = _agg_columns(_symbol_agg('priceAgg', table_name, price_column),
+                          [f'min_{price_column}', f'max_{price_column}', 'price_range'])
+    return [TextContent(type="text", text=f"Price range by symbol:\n{format_result(result)}")]
+
+
+async def _h_highest_prices(arguments: dict) -> list[TextContent]:
+    """Get the highest (max) price for each symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    price_column = arguments.get("price_column", "close")
+    error = _validate_table(table_name, price_column)
+    if error:
+        return error
+    result = _agg_columns(_symbol_agg('priceAgg', table_name, price_column), [f'max_{price_column}'])
+    return [TextContent(type="text", text=f"Highest {price_column} by symbol:\n{format_result(result)}")]
+
+
+async def _h_price_volatility(arguments: dict) -> list[TextContent]:
+    """Calculate price volatility (standard deviation) for each symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    price_column = arguments.get("price_column", "close")
+    error = _validate_table(table_name, price_column)
+    if error:
+        return error
+    result = _agg_columns(_symbol_agg('priceDist', table_name, price_column), [f'std_{price_column}'], ['volatility'])
+    return [TextContent(type="text", text=f"Price volatility (std dev) by symbol:\n{format_result(result)}")]
+
+
+async def _h_price_statistics(arguments: dict) -> list[TextContent]:
+    """Get comprehensive price stats: avg, median, std dev for each symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    price_column = arguments.get("price_column", "close")
+    error = _validate_table(table_name, price_column)
+    if error:
+        return error
+    result = _agg_columns(_symbol_agg('priceDist', table_name, price_column),
+                          [f'avg_{price_column}', f'median_{price_column}', f'std_{price_column}'])
+    return [TextContent(type="text", text=f"Price statistics by symbol:\n{format_result(result)}")]
+
+
+# =====================================================================
+# CATEGORY D: VOLUME ANALYSIS
+# =====================================================================
+
+
+async def _h_average_volume_by_symbol(arguments: dict) -> list[TextContent]:
+    """Calculate average trading volume for each symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    error = _validate_table(table_name)
+    if error:
+        return error
+    result = _agg_columns(_symbol_agg('volumeAgg', table_name), ['avg_volume'])
+    return [TextContent(type="text", text=f"Average volume by symbol:\n{format_result(result)}")]
+
+
+async def _h_total_volume_by_symbol(arguments: dict) -> list[TextContent]:
+    """Calculate total trading volume for each symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    error = _validate_table(table_name)
+    if error:
+        return error
+    result = _agg_columns(_symbol_agg('volumeAgg', table_name), ['total_volume'])
+    return [TextContent(type="text", text=f"Total volume by symbol:\n{format_result(result)}")]
+
+
+async def _h_top_volume_records(arguments: dict) -> list[TextContent]:
+    """Get records with the highest trading volume."""
+    table_name = arguments.get("table_name", "stocks")
+    limit = int(arguments.get("limit", 10))
+    error = _validate_table(table_name)
+    if error:
+        return error
+    result = kx.q('.mcp.topVolume', kx.SymbolAtom(table_name), limit)
+    return [TextContent(type="text", text=f"Top {len(result)} highest volume records:\n{format_result(result)}")]
+
+
+# =====================================================================
+# CATEGORY E: FILTERING & SELECTION
+# =====================================================================
+
+
+async def _h_filter_by_symbol(arguments: dict) -> list[TextContent]:
+    """Get data for a specific stock symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    symbol = _norm_sym(arguments.get("symbol"))
+    limit = int(arguments.get("limit", 100))
+    if not symbol:
+        return [TextContent(type="text", text="Error: symbol is required")]
+    error = _validate_table(table_name)
+    if error:
+        return error
+    count, result = kx.q('.mcp.filterSymbol', kx.SymbolAtom(table_name), kx.CharVector(symbol), limit)
+    count = count.py()
+    return [TextContent(type="text", text=f"Data for {symbol} ({count:,} total rows, showing {len(result)}):\n{format_result(result)}")]
+
+
+async def _h_filter_by_price_threshold(arguments: dict) -> list[TextContent]:
+    """Get records where price exceeds a threshold."""
+    table_name = arguments.get("table_name", "stocks")
+    price_column = arguments.get("price_column", "close")
+    threshold = arguments.get("threshold")
+    operator = arguments.get("operator", "gt")
+    if threshold is None:
+        return [TextContent(type="text", text="Error: threshold is required")]
+    error = _validate_table(table_name, price_column)
+    if error:
+        return error
+    op_map = {"gt": ">", "lt": "<", "gte": ">=", "lte": "<="}
+    if operator not in op_map:
+        operator = "gt"
+    op = op_map[operator]
+    threshold = float(threshold)
+    result = kx.q(f'.mcp.threshold{operator.capitalize()}', kx.SymbolAtom(table_name), kx.SymbolAtom(price_column), threshold)
+    return [TextContent(type="text", text=f"Records where {price_column} {op} {threshold}:\n{format_result(result)}")]
+
+
+async def _h_filter_by_date(arguments: dict) -> list[TextContent]:
+    """Get data from a specific year or date range."""
+    table_name = arguments.get("table_name", "stocks")
+    year = arguments.get("year")
+    start_date = arguments.get("start_date")
+    end_date = arguments.get("end_date")
+    error = _validate_table(table_name)
+    if error:
+        return error
+
+    try:
+        if year:
+            start = date(int(year), 1, 1)
+            result = kx.q('.mcp.countByDate', kx.SymbolAtom(table_name), start, None)
+            return [TextContent(type="text", text=f"Data from {year} onward:\n{format_result(result)}")]
+        elif start_date and end_date:
+            start, end = parse_q_date(start_date), parse_q_date(end_date)
+            result = kx.q('.mcp.countByDate', kx.SymbolAtom(table_name), start, end)
+            return [TextContent(type="text", text=f"Data from {start_date} to {end_date}:\n{format_result(result)}")]
+        else:
+            return [TextContent(type="text", text="Error: Provide either 'year' or both 'start_date' and 'end_date'")]
+    except ValueError:
+        return [TextContent(type="text", text="Error: Invalid year or date (expected YYYY.MM.DD)")]
+
+
+async def _h_symbol_summary(arguments: dict) -> list[TextContent]:
+    """Get a summary for a specific symbol: count, avg price, avg volume."""
+    table_name = arguments.get("table_name", "stocks")
+    symbol = _norm_sym(arguments.get("symbol"))
+    if not symbol:
+        return [TextContent(type="text", text="Error: symbol is required")]
+    error = _validate_table(table_name)
+    if error:
+        return error
+    result = kx.q('.mcp.symbolSummary', kx.SymbolAtom(table_name), kx.CharVector(symbol))
+    return [TextContent(type="text", text=f"Summary for {symbol}:\n{format_result(result)}")]
+
+
+# =====================================================================
+# CATEGORY F: ADVANCED ANALYTICS
+# =====================================================================
+
+
+async def _h_daily_ohlc(arguments: dict) -> list[TextContent]:
+    """Get daily OHLC (Open, High, Low, Close) aggregation for a symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    symbol = _norm_sym(arguments.get("symbol"))
+    limit = int(arguments.get("limit", 10))
+    if not symbol:
+        return [TextContent(type="text", text="Error: symbol is required")]
+    error = _validate_table(table_name)
+    if error:
+        return error
+    result = kx.q('.mcp.dailyOHLC', _symbol_agg('dailyRollup', table_name), kx.CharVector(symbol), limit)
+    return [TextContent(type="text", text=f"Daily OHLC for {symbol} (last {limit} days):\n{format_result(result)}")]
+
+
+async def _h_price_change_analysis(arguments: dict) -> list[TextContent]:
+    """Analyze daily price ranges and spread percentages by symbol."""
+    table_name = arguments.get("table_name", "stocks")
+    error = _validate_table(table_name)
+    if error:
+        return error
+    result = _agg_columns(_symbol_agg('rangeAgg', table_name), ['avg_daily_range', 'avg_spread_pct'])
+    return [TextContent(type="text", text=f"Price change analysis by symbol:\n{format_result(result)}")]
+
+
+async def _h_execute_query(arguments: dict) -> list[TextContent]:
+    """Execute a custom q query. Use for complex queries not covered by other tools. Dangerous operations are blocked."""
+    query = arguments.get("query", "").strip()
+    max_rows = min(int(arguments.get("max_rows", 100)), 10000)
+    if not query:
+        return [TextContent(type="text", text="Error: query is required")]
+    is_dangerous, reason = is_dangerous_query(query)
+    if is_dangerous:
+        return [TextContent(type="text", text=f"Error: Query blocked for safety. {reason}")]
+    try:
+        result = kx.q(query)
+    finally:
+        # The query may have created, modified or deleted tables, even if it
+        # then signalled an error
+        _invalidate_tables_cache()
+        LOADED_TABLES.intersection_update(get_cached_tables())
+    # format_result slices the result it is given, so it is not sent back
+    # through q a second time just to be truncated
+    if isinstance(result, _TRUNCATABLE) and len(result) > max_rows:
+        return [TextContent(type="text", text=f"Query result (limited to {max_rows} rows):\n{format_result(result, max_rows=min(max_rows, 100))}")]
+    return [TextContent(type="text", text=f"Query result:\n{format_result(result)}")]
+
+
+# =====================================================================
+# CATEGORY G: SERVER & TABLE MANAGEMENT
+# =====================================================================
+
+
+async def _h_server_info(arguments: dict) -> list[TextContent]:
+    """Get information about the KDB+/PyKX session and loaded tables."""
+    memory, counts = kx.q('.mcp.serverInfo')
+    used, mapped = memory.py()
+    tables = counts.py()
+    table_info = [f"    {t}: {count:,} rows" if count >= 0 else f"    {t}: N/A" for t, count in tables.items()]
+    return [TextContent(
+        type="text",
+        text=f"KDB+/PyKX Server Info:\n"
+             f"  PyKX Version: {PYKX_VERSION}\n"
+             f"  PyKX Licensed: {PYKX_LICENSED}\n"
+             f"  Data Directory: {DATA_DIR or 'Not set'}\n"
+             f"  Memory: {used:,} bytes used, {mapped:,} bytes mapped\n"
+             f"  Loaded Tables ({len(tables)}):\n" + '\n'.join(table_info)
+    )]
+
+
+async def _h_load_table(arguments: dict) -> list[TextContent]:
+    """Load a splayed table from disk into the session."""
+    table_path = arguments.get("table_path")
+    table_name = arguments.get("table_name")
+    if not table_path:
+        return [TextContent(type="text", text="Error: table_path is required")]
+    path = Path(table_path)
+    if not path.exists():
+        return [TextContent(type="text", text=f"Error: Path '{table_path}' does not exist")]
+    if not (path / '.d').exists():
+        return [TextContent(type="text", text=f"Error: '{table_path}' is not a valid splayed table")]
+    if not table_name:
+        table_name = path.name
+    if not validate_table_name(table_name):
+        return [TextContent(type="text", text=f"Error: Invalid table name: {table_name!r}")]
+    eager = bool(arguments.get("eager", False))
+    count = kx.q('.mcp.load', kx.SymbolAtom(table_name), kx.SymbolAtom(f':{path}'), eager).py()
+    _invalidate_tables_cache()
+    LOADED_TABLES.add(table_name)
+    try:
+        if arguments.get("build_indexes", True):
+            build_indexes(table_name)
+        table_meta(table_name)
+    except Exception as e:
+        logger.warning("Could not index table '%s': %s", table_name, e)
+    mode = "in memory" if eager else "memory-mapped"
+    return [TextContent(type="text", text=f"Loaded table '{table_name}' with {count:,} rows ({mode})")]
+
+
+HANDLERS: dict[str, Callable[[dict], Awaitable[list[TextContent]]]] = {
+    "list_tables": _h_list_tables,
+    "table_schema": _h_table_schema,
+    "table_count": _h_table_count,
+    "table_sample": _h_table_sample,
+    "column_names": _h_column_names,
+    "describe_table": _h_describe_table,
+    "distinct_values": _h_distinct_values,
+    "count_by_group": _h_count_by_group,
+    "date_range": _h_date_range,
+    "data_points_per_day": _h_data_points_per_day,
+    "column_stats": _h_column_stats,
+    "average_price_by_symbol": _h_average_price_by_symbol,
+    "price_range_by_symbol": _h_price_range_by_symbol,
+    "highest_prices": _h_highest_prices,
+    "price_volatility": _h_price_volatility,
+    "price_statistics": _h_price_statistics,
+    "average_volume_by_symbol": _h_average_volume_by_symbol,
+    "total_volume_by_symbol": _h_total_volume_by_symbol,
+    "top_volume_records": _h_top_volume_records,
+    "filter_by_symbol": _h_filter_by_symbol,
+    "filter_by_price_threshold": _h_filter_by_price_threshold,
+    "filter_by_date": _h_filter_by_date,
+    "symbol_summary": _h_symbol_summary,
+    "daily_ohlc": _h_daily_ohlc,
+    "price_change_analysis": _h_price_change_analysis,
+    "execute_query": _h_execute_query,
+    "server_info": _h_server_info,
+    "load_table": _h_load_table,
+}
+
+# Tools whose output depends only on their arguments and the loaded tables
+READ_ONLY_TOOLS = set(HANDLERS) - {"execute_query", "server_info", "load_table"}
 
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Handle tool calls from the MCP client."""
+    handler = HANDLERS.get(name)
+    if handler is None:
+        return [TextContent(type="text", text=f"Unknown tool: {name}")]
+
+    key = None
+    if name in READ_ONLY_TOOLS:
+        try:
+            key = (name, tuple(sorted(arguments.items())))
+            hit = _TOOL_CACHE.get(key)
+        except TypeError:
+            key = hit = None
+        if hit is not None and time.monotonic() - hit[0] < TOOL_CACHE_TTL:
+            _TOOL_CACHE.move_to_end(key)
+            return hit[1]
 
     try:
-        # =====================================================================
-        # CATEGORY A: BASIC TABLE INFORMATION
-        # =====================================================================
-        if name == "list_tables":
-            result = kx.q('tables[]')
-            tables = result.py()
-            if not tables:
-                return [TextContent(type="text", text="No tables found in the current session.")]
-            table_list = "\n".join([f"  - {t}" for t in tables])
-            return [TextContent(type="text", text=f"Available tables ({len(tables)}):\n{table_list}")]
-
-        elif name == "table_schema":
-            table_name = arguments.get("table_name")
-            if not validate_table_name(table_name):
-                return [TextContent(type="text", text="Error: Invalid table name format")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'meta {table_name}')
-            return [TextContent(type="text", text=f"Schema for '{table_name}':\n{format_result(result)}")]
-
-        elif name == "table_count":
-            table_name = arguments.get("table_name")
-            if not validate_table_name(table_name):
-                return [TextContent(type="text", text="Error: Invalid table name format")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            count = kx.q(f'count {table_name}').py()
-            return [TextContent(type="text", text=f"Table '{table_name}' has {count:,} rows")]
-
-        elif name == "table_sample":
-            table_name = arguments.get("table_name")
-            num_rows = min(arguments.get("num_rows", 10), 100)
-            if not validate_table_name(table_name):
-                return [TextContent(type="text", text="Error: Invalid table name format")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'{num_rows}#{table_name}')
-            return [TextContent(type="text", text=f"Sample ({num_rows} rows) from '{table_name}':\n{format_result(result)}")]
-
-        elif name == "column_names":
-            table_name = arguments.get("table_name")
-            if not validate_table_name(table_name):
-                return [TextContent(type="text", text="Error: Invalid table name format")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'cols {table_name}')
-            return [TextContent(type="text", text=f"Columns in '{table_name}':\n{format_result(result)}")]
-
-        # =====================================================================
-        # CATEGORY B: DATA DISCOVERY
-        # =====================================================================
-        elif name == "distinct_values":
-            table_name = arguments.get("table_name")
-            column_name = arguments.get("column_name")
-            limit = min(arguments.get("limit", 50), 500)
-            if not validate_table_name(table_name) or not validate_column_name(column_name):
-                return [TextContent(type="text", text="Error: Invalid table or column name")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'{limit}#distinct {table_name}`{column_name}')
-            return [TextContent(type="text", text=f"Distinct values in '{table_name}.{column_name}':\n{format_result(result)}")]
-
-        elif name == "count_by_group":
-            table_name = arguments.get("table_name")
-            group_column = arguments.get("group_column")
-            if not validate_table_name(table_name) or not validate_column_name(group_column):
-                return [TextContent(type="text", text="Error: Invalid table or column name")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select cnt: count i by {group_column} from {table_name}')
-            return [TextContent(type="text", text=f"Count by '{group_column}':\n{format_result(result)}")]
-
-        elif name == "date_range":
-            table_name = arguments.get("table_name")
-            date_column = arguments.get("date_column", "timestamp")
-            if not validate_table_name(table_name) or not validate_column_name(date_column):
-                return [TextContent(type="text", text="Error: Invalid table or column name")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select min_date: min {date_column}, max_date: max {date_column} from {table_name}')
-            return [TextContent(type="text", text=f"Date range in '{table_name}':\n{format_result(result)}")]
-
-        elif name == "data_points_per_day":
-            table_name = arguments.get("table_name")
-            date_column = arguments.get("date_column", "timestamp")
-            limit = arguments.get("limit", 10)
-            if not validate_table_name(table_name):
-                return [TextContent(type="text", text="Error: Invalid table name")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'{limit}#select cnt: count i by dt: `date${date_column} from {table_name}')
-            return [TextContent(type="text", text=f"Data points per day:\n{format_result(result)}")]
-
-        elif name == "column_stats":
-            table_name = arguments.get("table_name")
-            column_name = arguments.get("column_name")
-            if not validate_table_name(table_name) or not validate_column_name(column_name):
-                return [TextContent(type="text", text="Error: Invalid table or column name")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select cnt: count {column_name}, nulls: sum null {column_name}, distinct_cnt: count distinct {column_name} from {table_name}')
-            return [TextContent(type="text", text=f"Stats for '{table_name}.{column_name}':\n{format_result(result)}")]
-
-        # =====================================================================
-        # CATEGORY C: PRICE ANALYSIS
-        # =====================================================================
-        elif name == "average_price_by_symbol":
-            table_name = arguments.get("table_name", "stocks")
-            price_column = arguments.get("price_column", "close")
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select avg_{price_column}: avg {price_column} by symbol from {table_name}')
-            return [TextContent(type="text", text=f"Average {price_column} by symbol:\n{format_result(result)}")]
-
-        elif name == "price_range_by_symbol":
-            table_name = arguments.get("table_name", "stocks")
-            price_column = arguments.get("price_column", "close")
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select min_{price_column}: min {price_column}, max_{price_column}: max {price_column}, price_range: (max {price_column}) - min {price_column} by symbol from {table_name}')
-            return [TextContent(type="text", text=f"Price range by symbol:\n{format_result(result)}")]
-
-        elif name == "highest_prices":
-            table_name = arguments.get("table_name", "stocks")
-            price_column = arguments.get("price_column", "close")
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select max_{price_column}: max {price_column} by symbol from {table_name}')
-            return [TextContent(type="text", text=f"Highest {price_column} by symbol:\n{format_result(result)}")]
-
-        elif name == "price_volatility":
-            table_name = arguments.get("table_name", "stocks")
-            price_column = arguments.get("price_column", "close")
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select volatility: dev {price_column} by symbol from {table_name}')
-            return [TextContent(type="text", text=f"Price volatility (std dev) by symbol:\n{format_result(result)}")]
-
-        elif name == "price_statistics":
-            table_name = arguments.get("table_name", "stocks")
-            price_column = arguments.get("price_column", "close")
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select avg_{price_column}: avg {price_column}, median_{price_column}: med {price_column}, std_{price_column}: dev {price_column} by symbol from {table_name}')
-            return [TextContent(type="text", text=f"Price statistics by symbol:\n{format_result(result)}")]
-
-        # =====================================================================
-        # CATEGORY D: VOLUME ANALYSIS
-        # =====================================================================
-        elif name == "average_volume_by_symbol":
-            table_name = arguments.get("table_name", "stocks")
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select avg_volume: avg volume by symbol from {table_name}')
-            return [TextContent(type="text", text=f"Average volume by symbol:\n{format_result(result)}")]
-
-        elif name == "total_volume_by_symbol":
-            table_name = arguments.get("table_name", "stocks")
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select total_volume: sum volume by symbol from {table_name}')
-            return [TextContent(type="text", text=f"Total volume by symbol:\n{format_result(result)}")]
-
-        elif name == "top_volume_records":
-            table_name = arguments.get("table_name", "stocks")
-            limit = arguments.get("limit", 10)
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'{limit} sublist `volume xdesc select symbol, timestamp, volume from {table_name}')
-            return [TextContent(type="text", text=f"Top {limit} highest volume records:\n{format_result(result)}")]
-
-        # =====================================================================
-        # CATEGORY E: FILTERING & SELECTION
-        # =====================================================================
-        elif name == "filter_by_symbol":
-            table_name = arguments.get("table_name", "stocks")
-            symbol = arguments.get("symbol", "").upper()
-            limit = min(arguments.get("limit", 100), 1000)
-            if not symbol:
-                return [TextContent(type="text", text="Error: symbol is required")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'{limit}#select from {table_name} where symbol like "{symbol}"')
-            count = kx.q(f'count select from {table_name} where symbol like "{symbol}"').py()
-            return [TextContent(type="text", text=f"Data for {symbol} ({count:,} total rows, showing {limit}):\n{format_result(result)}")]
-
-        elif name == "filter_by_price_threshold":
-            table_name = arguments.get("table_name", "stocks")
-            price_column = arguments.get("price_column", "close")
-            threshold = arguments.get("threshold")
-            operator = arguments.get("operator", "gt")
-            if threshold is None:
-                return [TextContent(type="text", text="Error: threshold is required")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            op_map = {"gt": ">", "lt": "<", "gte": ">=", "lte": "<="}
-            op = op_map.get(operator, ">")
-            result = kx.q(f'select cnt: count i, symbols: distinct symbol from {table_name} where {price_column} {op} {threshold}')
-            return [TextContent(type="text", text=f"Records where {price_column} {op} {threshold}:\n{format_result(result)}")]
-
-        elif name == "filter_by_date":
-            table_name = arguments.get("table_name", "stocks")
-            year = arguments.get("year")
-            start_date = arguments.get("start_date")
-            end_date = arguments.get("end_date")
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-
-            if year:
-                result = kx.q(f'select cnt: count i by symbol from {table_name} where timestamp >= {year}.01.01')
-                return [TextContent(type="text", text=f"Data from {year} onward:\n{format_result(result)}")]
-            elif start_date and end_date:
-                result = kx.q(f'select cnt: count i by symbol from {table_name} where timestamp >= {start_date}, timestamp <= {end_date}')
-                return [TextContent(type="text", text=f"Data from {start_date} to {end_date}:\n{format_result(result)}")]
-            else:
-                return [TextContent(type="text", text="Error: Provide either 'year' or both 'start_date' and 'end_date'")]
-
-        elif name == "symbol_summary":
-            table_name = arguments.get("table_name", "stocks")
-            symbol = arguments.get("symbol", "").upper()
-            if not symbol:
-                return [TextContent(type="text", text="Error: symbol is required")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select cnt: count i, avg_close: avg close, avg_volume: avg volume from {table_name} where symbol like "{symbol}"')
-            return [TextContent(type="text", text=f"Summary for {symbol}:\n{format_result(result)}")]
-
-        # =====================================================================
-        # CATEGORY F: ADVANCED ANALYTICS
-        # =====================================================================
-        elif name == "daily_ohlc":
-            table_name = arguments.get("table_name", "stocks")
-            symbol = arguments.get("symbol", "").upper()
-            limit = arguments.get("limit", 10)
-            if not symbol:
-                return [TextContent(type="text", text="Error: symbol is required")]
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'{limit} sublist `dt xdesc select open: first open, high: max high, low: min low, close: last close, volume: sum volume by dt: `date$timestamp from {table_name} where symbol like "{symbol}"')
-            return [TextContent(type="text", text=f"Daily OHLC for {symbol} (last {limit} days):\n{format_result(result)}")]
-
-        elif name == "price_change_analysis":
-            table_name = arguments.get("table_name", "stocks")
-            if not table_exists(table_name):
-                return [TextContent(type="text", text=f"Error: Table '{table_name}' not found")]
-            result = kx.q(f'select avg_daily_range: avg (high - low), avg_spread_pct: avg 100 * (high - low) % low by symbol from {table_name}')
-            return [TextContent(type="text", text=f"Price change analysis by symbol:\n{format_result(result)}")]
-
-        elif name == "execute_query":
-            query = arguments.get("query", "").strip()
-            max_rows = min(arguments.get("max_rows", 100), 10000)
-            if not query:
-                return [TextContent(type="text", text="Error: query is required")]
-            is_dangerous, reason = is_dangerous_query(query)
-            if is_dangerous:
-                return [TextContent(type="text", text=f"Error: Query blocked for safety. {reason}")]
-            result = kx.q(query)
-            try:
-                if hasattr(result, '__len__') and len(result) > max_rows:
-                    result = kx.q(f'{max_rows}#', result)
-                    return [TextContent(type="text", text=f"Query result (limited to {max_rows} rows):\n{format_result(result)}")]
-            except:
-                pass
-            return [TextContent(type="text", text=f"Query result:\n{format_result(result)}")]
-
-        # =====================================================================
-        # CATEGORY G: SERVER & TABLE MANAGEMENT
-        # =====================================================================
-        elif name == "server_info":
-            tables = kx.q('tables[]').py()
-            table_info = []
-            for t in tables:
-                try:
-                    count = kx.q(f'count {t}').py()
-                    table_info.append(f"    {t}: {count:,} rows")
-                except:
-                    table_info.append(f"    {t}: N/A")
-            return [TextContent(
-                type="text",
-                text=f"KDB+/PyKX Server Info:\n"
-                     f"  PyKX Version: {kx.__version__}\n"
-                     f"  PyKX Licensed: {kx.licensed}\n"
-                     f"  Data Directory: {DATA_DIR or 'Not set'}\n"
-                     f"  Loaded Tables ({len(tables)}):\n" + '\n'.join(table_info)
-            )]
-
-        elif name == "load_table":
-            table_path = arguments.get("table_path")
-            table_name = arguments.get("table_name")
-            if not table_path:
-                return [TextContent(type="text", text="Error: table_path is required")]
-            path = Path(table_path)
-            if not path.exists():
-                return [TextContent(type="text", text=f"Error: Path '{table_path}' does not exist")]
-            if not (path / '.d').exists():
-                return [TextContent(type="text", text=f"Error: '{table_path}' is not a valid splayed table")]
-            if not table_name:
-                table_name = path.name
-            if not validate_table_name(table_name):
-                return [TextContent(type="text", text="Error: Invalid table name format")]
-            kx.q(f'{table_name}: get`:{path}')
-            count = kx.q(f'count {table_name}').py()
-            return [TextContent(type="text", text=f"Loaded table '{table_name}' with {count:,} rows")]
-
-        else:
-            return [TextContent(type="text", text=f"Unknown tool: {name}")]
-
+        result = split_content(await handler(arguments))
+        if key is not None:
+            if key not in _TOOL_CACHE and len(_TOOL_CACHE) >= TOOL_CACHE_SIZE:
+                _TOOL_CACHE.popitem(last=False)
+            _TOOL_CACHE[key] = (time.monotonic(), result)
+            _TOOL_CACHE.move_to_end(key)
+        return result
     except kx.exceptions.QError as e:
         return [TextContent(type="text", text=f"KDB+ Error: {str(e)}")]
     except Exception as e:
-        logger.exception(f"Error in tool {name}")
+        logger.exception("Error in tool %s", name)
         return [TextContent(type="text", text=f"Error: {str(e)}")]
 
 
 async def main():
     """Main entry point for the MCP server."""
-    global DATA_DIR, LOADED_TABLES
+    global DATA_DIR
 
     parser = argparse.ArgumentParser(description="KDB+ PyKX MCP Server")
     parser.add_argument("--data-dir", default=None,
@@ -800,18 +1293,21 @@ async def main():
 
     args = parser.parse_args()
 
-    logger.info(f"Starting KDB+ PyKX MCP Server")
-    logger.info(f"PyKX Version: {kx.__version__}")
-    logger.info(f"PyKX Licensed: {kx.licensed}")
+    logger.info("Starting KDB+ PyKX MCP Server")
+    logger.info("PyKX Version: %s", PYKX_VERSION)
+    logger.info("PyKX Licensed: %s", PYKX_LICENSED)
 
-    if not kx.licensed:
+    if not PYKX_LICENSED:
         logger.warning("PyKX is running in unlicensed mode. Some features may be limited.")
 
+    _register_q_helpers()
+
     if args.data_dir:
         DATA_DIR = args.data_dir
-        logger.info(f"Loading tables from: {DATA_DIR}")
-        LOADED_TABLES = load_tables_from_directory(DATA_DIR)
-        logger.info(f"Loaded {len(LOADED_TABLES)} table(s): {LOADED_TABLES}")
+        logger.info("Loading tables from: %s", DATA_DIR)
+        loaded = load_tables_from_directory(DATA_DIR)
+        LOADED_TABLES.update(loaded)
+        logger.info("Loaded %d table(s): %s", len(loaded), loaded)
 
     async with stdio_server() as (read_stream, write_stream):
         await app.run(read_stream, write_stream, app.create_initialization_options())
@@ -819,4 +1315,8 @@ async def main():
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(main())
+    # uvloop's libuv-based event loop, when installed, cuts per-request overhead
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
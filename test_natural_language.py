@@ -110,10 +110,10 @@ print("\n" + "=" * 80)
 print("ASSESSMENT")
 print("=" * 80)
 print("""
-The MCP Server provides 27 tools organized into 7 categories:
+The MCP Server provides 28 tools organized into 7 categories:
 
-CATEGORY A: Basic Table Information (5 tools)
-- list_tables, table_schema, table_count, table_sample, column_names
+CATEGORY A: Basic Table Information (6 tools)
+- list_tables, table_schema, table_count, table_sample, column_names, describe_table
 - Coverage: Excellent - All basic exploration needs covered
 
 CATEGORY B: Data Discovery (5 tools)